@@ -9,13 +9,94 @@ https://crashbytes.com/articles/tutorial-zero-downtime-database-migrations-enter
 
 import time
 import asyncio
-from typing import Dict, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
 import logging
-import psycopg2
+import asyncpg
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Replication lag for a subscriber, as seen from the publisher. Kept
+# constant and parameterized so asyncpg's per-connection statement cache
+# parses and plans it once per pooled connection rather than once per poll.
+_LAG_SQL = """
+    SELECT 
+        EXTRACT(EPOCH FROM replay_lag) AS lag_seconds,
+        pg_wal_lsn_diff(sent_lsn, replay_lsn) AS lag_bytes
+    FROM pg_stat_replication
+    WHERE application_name = $1
+"""
+
+# Bytes of blue's WAL, up to a given LSN, that green's subscription has
+# not yet reported back to blue. Evaluated on green, so polling it puts
+# no load on the blue primary. relid IS NULL selects the main apply
+# worker rather than per-table sync workers. Subscriptions are listed
+# cluster-wide, so only the current database's one is matched.
+_FENCE_REMAINING_SQL = """
+    SELECT pg_wal_lsn_diff($1::text::pg_lsn, st.latest_end_lsn) AS remaining
+    FROM pg_stat_subscription st
+    JOIN pg_subscription s ON s.oid = st.subid
+    JOIN pg_database d ON d.oid = s.subdbid
+    WHERE st.subname = $2
+    AND st.relid IS NULL
+    AND d.datname = current_database()
+"""
+
+# Rows written to the current database since the stats were last reset.
+# Tuple counters are used rather than xact_commit because the verification
+# queries themselves commit transactions but never write rows.
+_WRITES_SQL = """
+    SELECT tup_inserted + tup_updated + tup_deleted
+    FROM pg_stat_database
+    WHERE datname = current_database()
+"""
+
+# application_name of the orchestrator's own sessions, so draining
+# writers never terminates them
+APPLICATION_NAME = "blue_green_migration"
+
+# Terminate every other client session on the current database
+_DRAIN_WRITERS_SQL = """
+    SELECT COUNT(pg_terminate_backend(pid))
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+    AND pid <> pg_backend_pid()
+    AND backend_type = 'client backend'
+    AND application_name <> $1
+"""
+
+# Whether new sessions on the current database default to read-only,
+# as set by _set_read_only. Read from the catalog because the
+# orchestrator's own sessions override the default
+_READ_ONLY_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM pg_db_role_setting s
+        JOIN pg_database d ON d.oid = s.setdatabase
+        WHERE d.datname = current_database()
+        AND s.setrole = 0
+        AND 'default_transaction_read_only=on' = ANY(s.setconfig)
+    )
+"""
+
+# NOTIFY channel that wakes the cutover catch-up wait early
+CATCH_UP_CHANNEL = "replication_caught_up"
+
+# Exponential backoff between replication lag polls (seconds)
+_BACKOFF_INITIAL = 0.05
+_BACKOFF_FACTOR = 1.5
+_BACKOFF_MAX = 2.0
+
+# How long to watch for application writes after switching databases
+_TRAFFIC_TIMEOUT = 10.0
+_TRAFFIC_BACKOFF_MAX = 1.0
+
+
+def _quote_ident(name: str) -> str:
+    """Quote a name for use as an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
 
 class BlueGreenMigration:
     """
@@ -29,18 +110,126 @@ class BlueGreenMigration:
     5. Stop replication and decommission blue
     """
     
-    def __init__(self, blue_conn: str, green_conn: str):
+    def __init__(
+        self,
+        blue_conn: str,
+        green_conn: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        subscriber_name: str = "green_subscriber",
+        subscription_name: Optional[str] = "green_from_blue_sub",
+        pools: Optional[Dict[str, asyncpg.Pool]] = None
+    ):
         """
         Initialize blue-green migration orchestrator.
         
         Args:
             blue_conn: Connection string for blue (current) database
             green_conn: Connection string for green (new) database
+            min_size: Minimum connections kept open per database pool
+            max_size: Maximum connections per database pool
+            subscriber_name: application_name of the green subscriber
+                             as reported in blue's pg_stat_replication
+            subscription_name: Name of the subscription on green. None if
+                               blue's writes reach green some other way
+                               (e.g. BidirectionalSync); the cutover then
+                               has no commit-accurate fence to wait for
+            pools: Existing pools by connection string, created with
+                   create_pool(); they are shared and stay open on aclose()
         """
         self.blue_conn = blue_conn
         self.green_conn = green_conn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.subscriber_name = subscriber_name
+        self.subscription_name = subscription_name
         self.replication_active = False
         self.cutover_complete = False
+        self._pre_cutover_writes = 0
+        
+        # Created on first use inside the running loop; see fence_reached
+        self._fence_reached: Optional[asyncio.Event] = None
+        
+        # Connection pools are created on first use so that constructing
+        # the orchestrator never requires both databases to be reachable.
+        # asyncpg pools must be created inside the running event loop.
+        self._pools: Dict[str, asyncpg.Pool] = dict(pools or {})
+        self._shared_pools = set(self._pools)
+    
+    @property
+    def fence_reached(self) -> asyncio.Event:
+        """
+        Event set once green has confirmed the cutover fence.
+        
+        Lets companion tasks (e.g. BidirectionalSync.run_until) stop
+        without polling. Created on first access rather than in __init__,
+        as on Python 3.9 an Event binds to the loop current at creation.
+        """
+        if self._fence_reached is None:
+            self._fence_reached = asyncio.Event()
+        return self._fence_reached
+    
+    async def connect(self) -> None:
+        """Create the blue and green connection pools ahead of first use."""
+        await self._get_pool(self.blue_conn)
+        await self._get_pool(self.green_conn)
+    
+    @staticmethod
+    async def create_pool(
+        conn_string: str,
+        min_size: int = 2,
+        max_size: int = 10
+    ) -> asyncpg.Pool:
+        """
+        Create a connection pool suitable for the orchestrator.
+        
+        Args:
+            conn_string: Database connection
+            min_size: Minimum connections kept open
+            max_size: Maximum connections
+        
+        Returns:
+            asyncpg connection pool
+        """
+        return await asyncpg.create_pool(
+            conn_string,
+            min_size=min_size,
+            max_size=max_size,
+            # Orchestrator sessions must stay writable after the
+            # database default is switched to read-only, and survive
+            # the drain of client backends
+            server_settings={
+                "application_name": APPLICATION_NAME,
+                "default_transaction_read_only": "off"
+            }
+        )
+    
+    async def _get_pool(self, conn_string: str) -> asyncpg.Pool:
+        """Return the connection pool for a connection string."""
+        if conn_string not in self._pools:
+            self._pools[conn_string] = await self.create_pool(
+                conn_string, self.min_size, self.max_size
+            )
+        return self._pools[conn_string]
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections this orchestrator opened."""
+        for conn_string, conn_pool in list(self._pools.items()):
+            if conn_string not in self._shared_pools:
+                await conn_pool.close()
+                del self._pools[conn_string]
+    
+    @asynccontextmanager
+    async def blue_connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """
+        Hold one pooled blue connection for a sequence of calls.
+        
+        Pass it as ``conn`` to verify_replication_lag to run a whole
+        polling loop on a single connection.
+        """
+        blue_pool = await self._get_pool(self.blue_conn)
+        async with blue_pool.acquire() as con:
+            yield con
         
     async def setup_green_database(self, schema_sql: Optional[str] = None) -> bool:
         """
@@ -53,6 +242,9 @@ class BlueGreenMigration:
         
         Args:
             schema_sql: Optional SQL for new schema. If None, copies from blue.
+                        May hold several statements; they are sent as one
+                        batch and applied atomically, so a failure leaves
+                        no partial schema on green.
         
         Returns:
             True if successful
@@ -60,20 +252,21 @@ class BlueGreenMigration:
         logger.info("Setting up green database")
         
         try:
-            with psycopg2.connect(self.green_conn) as conn:
-                with conn.cursor() as cur:
+            green_pool = await self._get_pool(self.green_conn)
+            async with green_pool.acquire() as con:
+                async with con.transaction():
                     if schema_sql:
-                        # Apply new schema
+                        # Apply new schema. Without query arguments asyncpg
+                        # uses the simple query protocol, which accepts the
+                        # whole multi-statement script in one round trip.
                         logger.info("Applying new schema to green database")
-                        cur.execute(schema_sql)
+                        await con.execute(schema_sql)
                     else:
                         # Copy schema from blue
                         logger.info("Copying schema from blue to green")
                         # This would use pg_dump/pg_restore in production
                         # Simplified for example
                         pass
-                    
-                    conn.commit()
             
             logger.info("Green database setup complete")
             return True
@@ -98,22 +291,22 @@ class BlueGreenMigration:
         
         try:
             # Configure logical replication (simplified example)
-            with psycopg2.connect(self.blue_conn) as conn:
-                with conn.cursor() as cur:
-                    # Create publication on blue (source)
-                    cur.execute("""
-                        SELECT 1 FROM pg_publication 
+            blue_pool = await self._get_pool(self.blue_conn)
+            # Create publication on blue (source). The existence check and
+            # the CREATE run server-side in a single round trip.
+            await blue_pool.execute("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_publication
                         WHERE pubname = 'blue_to_green_pub'
-                    """)
-                    
-                    if not cur.fetchone():
-                        cur.execute("""
-                            CREATE PUBLICATION blue_to_green_pub 
-                            FOR ALL TABLES
-                        """)
-                        logger.info("Created publication on blue database")
-                    
-                    conn.commit()
+                    ) THEN
+                        CREATE PUBLICATION blue_to_green_pub FOR ALL TABLES;
+                    END IF;
+                END
+                $$
+            """)
+            logger.info("Publication ready on blue database")
             
             # Create subscription on green (target)
             # Note: This is simplified. In production, you'd need proper
@@ -128,57 +321,70 @@ class BlueGreenMigration:
             logger.error(f"Failed to start replication: {str(e)}")
             return False
     
-    async def verify_replication_lag(self) -> Dict[str, float]:
+    async def verify_replication_lag(
+        self,
+        *,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict:
         """
         Check replication lag between blue and green.
         
+        Args:
+            conn: Blue connection to reuse (see blue_connection). If None,
+                  one is borrowed from the pool for this call.
+        
         Returns:
             Dict with lag metrics:
             - lag_seconds: Replication lag in seconds
             - lag_bytes: Bytes behind in replication
+            - error: Only present if the lag could not be read; both
+              metrics are then infinite so no threshold reads as met
         """
         try:
-            with psycopg2.connect(self.blue_conn) as conn:
-                with conn.cursor() as cur:
-                    # Query replication status
-                    cur.execute("""
-                        SELECT 
-                            EXTRACT(EPOCH FROM (now() - replay_lsn::text::pg_lsn)) AS lag_seconds,
-                            pg_wal_lsn_diff(sent_lsn, replay_lsn) AS lag_bytes
-                        FROM pg_stat_replication
-                        WHERE application_name = 'green_subscriber'
-                    """)
-                    
-                    result = cur.fetchone()
-                    
-                    if result:
-                        lag_seconds = result[0] if result[0] else 0.0
-                        lag_bytes = result[1] if result[1] else 0
-                        
-                        return {
-                            "lag_seconds": lag_seconds,
-                            "lag_bytes": lag_bytes
-                        }
-                    else:
-                        # No replication data available
-                        return {"lag_seconds": 0.0, "lag_bytes": 0}
+            if conn is None:
+                conn = await self._get_pool(self.blue_conn)
+            # Query replication status
+            result = await conn.fetchrow(_LAG_SQL, self.subscriber_name)
+            
+            if result:
+                lag_seconds = float(result["lag_seconds"] or 0.0)
+                lag_bytes = int(result["lag_bytes"] or 0)
+                
+                return {
+                    "lag_seconds": lag_seconds,
+                    "lag_bytes": lag_bytes
+                }
+            else:
+                # No replication data available
+                return {"lag_seconds": 0.0, "lag_bytes": 0}
                         
         except Exception as e:
             logger.warning(f"Could not verify replication lag: {str(e)}")
-            return {"lag_seconds": 0.0, "lag_bytes": 0}
+            return {
+                "lag_seconds": float("inf"),
+                "lag_bytes": float("inf"),
+                "error": str(e)
+            }
     
-    async def cutover_to_green(self, max_lag_seconds: float = 1.0) -> bool:
+    async def cutover_to_green(
+        self,
+        max_lag_seconds: float = 1.0,
+        max_wait_time: float = 300.0
+    ) -> bool:
         """
         Perform cutover to green database.
         
         Steps:
-        1. Set blue to read-only
-        2. Wait for replication catch-up
-        3. Update application config
-        4. Verify green is receiving traffic
+        1. Wait for replication lag to drop while blue still takes writes
+        2. Reopen green for writes if a rollback fenced it, then set
+           blue to read-only and capture the fence LSN
+        3. Wait until green has confirmed everything up to the fence
+        4. Update application config
+        5. Verify green is receiving traffic
         
         Args:
-            max_lag_seconds: Maximum acceptable lag before cutover
+            max_lag_seconds: Maximum acceptable lag before blue is fenced
+            max_wait_time: Seconds to wait for catch-up before rolling back
         
         Returns:
             True if cutover successful
@@ -186,34 +392,51 @@ class BlueGreenMigration:
         logger.info("Starting cutover to green database")
         
         try:
-            # Step 1: Set blue to read-only
-            logger.info("Setting blue database to read-only")
-            await self._set_read_only(self.blue_conn, True)
+            deadline = time.monotonic() + max_wait_time
             
-            # Step 2: Wait for replication catch-up
+            # Step 1: Wait for replication catch-up. Blue stays writable
+            # here so the read-only window only covers the last stretch.
             logger.info("Waiting for replication to catch up")
-            max_wait_time = 300  # 5 minutes timeout
-            start_time = time.time()
+            caught_up = await self._wait_for_catch_up(
+                max_lag_seconds,
+                max_wait_time
+            )
             
-            while time.time() - start_time < max_wait_time:
-                lag = await self.verify_replication_lag()
+            if caught_up:
+                # A previous rollback leaves green read-only, so reopen it
+                # for writes before blue stops taking them
+                if await self._is_read_only(self.green_conn):
+                    await self._set_read_only(self.green_conn, False)
+                    await self._drain_writers(self.green_conn)
                 
-                if lag["lag_seconds"] < max_lag_seconds:
-                    logger.info(
-                        f"Replication caught up: {lag['lag_seconds']:.2f}s lag"
-                    )
-                    break
+                # Step 2: Set blue to read-only and fence its WAL position
+                logger.info("Setting blue database to read-only")
+                await self._set_read_only(self.blue_conn, True)
+                await self._drain_writers(self.blue_conn)
+                fence_lsn = await self._capture_fence_lsn()
                 
-                logger.info(
-                    f"Waiting for replication: {lag['lag_seconds']:.2f}s lag"
-                )
-                await asyncio.sleep(1)
-            else:
+                # Step 3: Wait for green to confirm everything up to the fence
+                try:
+                    await asyncio.wait_for(
+                        self.wait_until_caught_up(fence_lsn),
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    caught_up = False
+                else:
+                    # Replication has applied everything blue wrote, so
+                    # later green writes can only come from the application
+                    self._pre_cutover_writes = await self._snapshot_writes(
+                        self.green_conn
+                    )
+                    self.fence_reached.set()
+            
+            if not caught_up:
                 logger.error("Replication catch-up timeout")
                 await self.rollback_to_blue()
                 return False
             
-            # Step 3: Update application connection
+            # Step 4: Update application connection
             # In production, this would trigger application redeployment
             # or update connection pooler configuration
             logger.info("Ready to update application to use green database")
@@ -221,9 +444,8 @@ class BlueGreenMigration:
                 "UPDATE APPLICATION CONFIG: Change database connection to green"
             )
             
-            # Step 4: Verify traffic on green
-            await asyncio.sleep(5)  # Wait for connections to switch
-            await self._verify_green_traffic()
+            # Step 5: Verify traffic on green
+            await self._verify_green_traffic(self._pre_cutover_writes)
             
             self.cutover_complete = True
             logger.info("Cutover to green database complete")
@@ -235,6 +457,153 @@ class BlueGreenMigration:
             await self.rollback_to_blue()
             return False
     
+    async def _wait_for_catch_up(
+        self,
+        max_lag_seconds: float,
+        max_wait_time: float
+    ) -> bool:
+        """
+        Wait for replication lag to drop below a threshold.
+        
+        Args:
+            max_lag_seconds: Maximum acceptable lag
+            max_wait_time: Seconds to wait before giving up
+        
+        Returns:
+            True if replication caught up before the timeout
+        """
+        async def lag_acceptable() -> bool:
+            lag = await self.verify_replication_lag(conn=conn)
+            
+            if "error" in lag:
+                # Already logged; an unreadable lag never counts as caught up
+                return False
+            
+            if lag["lag_seconds"] < max_lag_seconds:
+                logger.info(
+                    f"Replication caught up: {lag['lag_seconds']:.2f}s lag"
+                )
+                return True
+            
+            logger.info(
+                f"Waiting for replication: {lag['lag_seconds']:.2f}s lag"
+            )
+            return False
+        
+        # Keep one blue connection for the whole wait
+        async with self.blue_connection() as conn:
+            try:
+                await asyncio.wait_for(
+                    self._poll_until(lag_acceptable),
+                    timeout=max_wait_time
+                )
+                return True
+            except asyncio.TimeoutError:
+                return False
+    
+    async def wait_until_caught_up(self, fence_lsn: str) -> None:
+        """
+        Wait until green has applied all of blue's WAL up to a fence LSN.
+        
+        Progress is read on green from pg_stat_subscription.latest_end_lsn,
+        the WAL position the apply worker has processed and reported back
+        to blue. Unlike the lag estimate this is commit-accurate: once it
+        passes the fence, every transaction committed on blue before it
+        was fenced has been applied on green. Each check is a single
+        scalar comparison and keeps the polling load off blue.
+        
+        Runs until caught up; wrap in asyncio.wait_for to bound it.
+        
+        Args:
+            fence_lsn: WAL position captured after blue was made read-only
+        
+        Raises:
+            RuntimeError: If green has no subscription named
+                          subscription_name
+        """
+        if self.subscription_name is None:
+            logger.warning("No subscription configured; not waiting for fence")
+            return
+        
+        green_pool = await self._get_pool(self.green_conn)
+        
+        async def fence_reached() -> bool:
+            result = await green_pool.fetchrow(
+                _FENCE_REMAINING_SQL,
+                fence_lsn,
+                self.subscription_name
+            )
+            
+            if result is None:
+                # Without the subscription nothing proves green has the
+                # fenced writes, so the cutover must not go ahead
+                raise RuntimeError(
+                    f"Subscription {self.subscription_name} not found on green"
+                )
+            
+            remaining = result["remaining"]
+            
+            if remaining is not None and remaining <= 0:
+                logger.info(f"Green confirmed fence LSN {fence_lsn}")
+                return True
+            
+            logger.info(f"Waiting for fence LSN: {remaining} bytes behind")
+            return False
+        
+        await self._poll_until(fence_reached)
+    
+    async def _poll_until(self, check: Callable[[], Awaitable[bool]]) -> None:
+        """
+        Re-run a check with exponential backoff until it returns True.
+        
+        Backoff keeps the check cheap on the server while still detecting
+        the end of catch-up quickly. A NOTIFY on CATCH_UP_CHANNEL (e.g.
+        from a sentinel trigger on green) cuts the current backoff short
+        and forces an immediate re-check.
+        
+        Args:
+            check: Coroutine function returning True once done
+        """
+        notified = asyncio.Event()
+        
+        def on_notify(connection, pid, channel, payload):
+            notified.set()
+        
+        green_pool = await self._get_pool(self.green_conn)
+        async with green_pool.acquire() as listener:
+            await listener.add_listener(CATCH_UP_CHANNEL, on_notify)
+            
+            try:
+                delay = _BACKOFF_INITIAL
+                
+                while True:
+                    notified.clear()
+                    
+                    if await check():
+                        return
+                    
+                    try:
+                        await asyncio.wait_for(notified.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    
+                    delay = min(delay * _BACKOFF_FACTOR, _BACKOFF_MAX)
+                
+            finally:
+                await listener.remove_listener(CATCH_UP_CHANNEL, on_notify)
+    
+    async def _capture_fence_lsn(self) -> str:
+        """
+        Capture blue's current WAL position as the cutover fence.
+        
+        Returns:
+            LSN in text form (e.g. "0/16B3748")
+        """
+        blue_pool = await self._get_pool(self.blue_conn)
+        fence_lsn = await blue_pool.fetchval("SELECT pg_current_wal_lsn()::text")
+        logger.info(f"Captured cutover fence LSN {fence_lsn}")
+        return fence_lsn
+    
     async def rollback_to_blue(self) -> bool:
         """
         Emergency rollback to blue database.
@@ -245,11 +614,20 @@ class BlueGreenMigration:
         logger.warning("Rolling back to blue database")
         
         try:
-            # Set green to read-only
-            await self._set_read_only(self.green_conn, True)
+            baseline = await self._snapshot_writes(self.blue_conn)
+            blue_fenced = await self._is_read_only(self.blue_conn)
             
-            # Enable writes on blue
-            await self._set_read_only(self.blue_conn, False)
+            # Set green to read-only and enable writes on blue. The two
+            # servers are independent, so both changes go out concurrently.
+            await asyncio.gather(
+                self._set_read_only(self.green_conn, True),
+                self._set_read_only(self.blue_conn, False)
+            )
+            await self._drain_writers(self.green_conn)
+            if blue_fenced:
+                # Sessions that reconnected to blue during the fence are
+                # still read-only
+                await self._drain_writers(self.blue_conn)
             
             # Update application config
             logger.info(
@@ -257,10 +635,10 @@ class BlueGreenMigration:
             )
             
             # Verify traffic on blue
-            await asyncio.sleep(5)
-            await self._verify_blue_traffic()
+            await self._verify_blue_traffic(baseline)
             
             self.cutover_complete = False
+            self.fence_reached.clear()
             logger.info("Rollback to blue database complete")
             return True
             
@@ -278,21 +656,12 @@ class BlueGreenMigration:
         logger.info("Stopping replication")
         
         try:
-            with psycopg2.connect(self.green_conn) as conn:
-                with conn.cursor() as cur:
-                    # Drop subscription on green
-                    cur.execute("""
-                        DROP SUBSCRIPTION IF EXISTS green_from_blue_sub
-                    """)
-                    conn.commit()
-            
-            with psycopg2.connect(self.blue_conn) as conn:
-                with conn.cursor() as cur:
-                    # Drop publication on blue
-                    cur.execute("""
-                        DROP PUBLICATION IF EXISTS blue_to_green_pub
-                    """)
-                    conn.commit()
+            # Blue and green are independent servers, drop both sides
+            # concurrently
+            await asyncio.gather(
+                self._drop_subscription(),
+                self._drop_publication()
+            )
             
             self.replication_active = False
             logger.info("Replication stopped")
@@ -302,10 +671,33 @@ class BlueGreenMigration:
             logger.error(f"Failed to stop replication: {str(e)}")
             return False
     
+    async def _drop_subscription(self) -> None:
+        """Drop the subscription on green."""
+        if self.subscription_name is None:
+            return
+        green_pool = await self._get_pool(self.green_conn)
+        # Runs outside a transaction block, which DROP SUBSCRIPTION requires,
+        # so the name is quoted here rather than with format() in a DO block
+        await green_pool.execute(
+            f"DROP SUBSCRIPTION IF EXISTS {_quote_ident(self.subscription_name)}"
+        )
+    
+    async def _drop_publication(self) -> None:
+        """Drop the publication on blue."""
+        blue_pool = await self._get_pool(self.blue_conn)
+        await blue_pool.execute("""
+            DROP PUBLICATION IF EXISTS blue_to_green_pub
+        """)
+    
     async def _set_read_only(self, conn_string: str, read_only: bool) -> None:
         """
         Set database to read-only mode.
         
+        The setting is applied with ALTER DATABASE so it becomes the
+        default for every new session, not just the one issuing it.
+        Sessions that are already open keep their current mode; use
+        _drain_writers to close them.
+        
         Args:
             conn_string: Database connection string
             read_only: True for read-only, False for read-write
@@ -313,80 +705,147 @@ class BlueGreenMigration:
         mode = "read only" if read_only else "read write"
         logger.info(f"Setting database to {mode}")
         
+        if read_only:
+            action = "SET default_transaction_read_only = on"
+        else:
+            action = "RESET default_transaction_read_only"
+        
         try:
-            with psycopg2.connect(conn_string) as conn:
-                conn.autocommit = True
-                with conn.cursor() as cur:
-                    if read_only:
-                        cur.execute("SET default_transaction_read_only = on")
-                    else:
-                        cur.execute("SET default_transaction_read_only = off")
+            conn_pool = await self._get_pool(conn_string)
+            await conn_pool.execute(f"""
+                DO $$
+                BEGIN
+                    EXECUTE format(
+                        'ALTER DATABASE %I {action}',
+                        current_database()
+                    );
+                END
+                $$
+            """)
                         
         except Exception as e:
             logger.error(f"Failed to set read-only mode: {str(e)}")
             raise
     
-    async def _verify_green_traffic(self) -> bool:
+    async def _is_read_only(self, conn_string: str) -> bool:
+        """
+        Check whether new sessions on a database default to read-only.
+        
+        Args:
+            conn_string: Database connection string
+        
+        Returns:
+            True if _set_read_only left the database read-only
+        """
+        conn_pool = await self._get_pool(conn_string)
+        return await conn_pool.fetchval(_READ_ONLY_SQL)
+    
+    async def _drain_writers(self, conn_string: str) -> int:
+        """
+        Terminate open client sessions so they reconnect in the new mode.
+        
+        Args:
+            conn_string: Database connection string
+        
+        Returns:
+            Number of sessions terminated
+        """
+        conn_pool = await self._get_pool(conn_string)
+        terminated = await conn_pool.fetchval(
+            _DRAIN_WRITERS_SQL,
+            APPLICATION_NAME
+        )
+        logger.info(f"Terminated {terminated} existing sessions")
+        return terminated
+    
+    async def _snapshot_writes(self, conn_string: str) -> int:
+        """
+        Snapshot the number of rows written to a database so far.
+        
+        Args:
+            conn_string: Database connection string
+        
+        Returns:
+            Combined inserted/updated/deleted tuple count
+        """
+        conn_pool = await self._get_pool(conn_string)
+        return await conn_pool.fetchval(_WRITES_SQL) or 0
+    
+    async def _wait_for_writes(self, conn_string: str, baseline: int) -> bool:
+        """
+        Wait for new writes on a database after a traffic switch.
+        
+        Polls with exponential backoff and returns as soon as the write
+        counter moves past the baseline.
+        
+        Args:
+            conn_string: Database connection string
+            baseline: Write count from _snapshot_writes before the switch
+        
+        Returns:
+            True if writes were seen before _TRAFFIC_TIMEOUT
+        """
+        conn_pool = await self._get_pool(conn_string)
+        deadline = time.monotonic() + _TRAFFIC_TIMEOUT
+        delay = _BACKOFF_INITIAL
+        
+        while True:
+            current = await conn_pool.fetchval(_WRITES_SQL) or 0
+            
+            if current - baseline > 0:
+                return True
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * _BACKOFF_FACTOR, _TRAFFIC_BACKOFF_MAX)
+    
+    async def _verify_green_traffic(self, baseline: int) -> bool:
         """
         Verify green database is receiving writes.
         
+        Args:
+            baseline: Green write count captured before the cutover
+        
         Returns:
             True if traffic detected
         """
         logger.info("Verifying green database traffic")
         
         try:
-            with psycopg2.connect(self.green_conn) as conn:
-                with conn.cursor() as cur:
-                    # Check for recent activity
-                    cur.execute("""
-                        SELECT COUNT(*) 
-                        FROM pg_stat_database 
-                        WHERE datname = current_database()
-                        AND xact_commit > 0
-                    """)
-                    
-                    count = cur.fetchone()[0]
-                    
-                    if count > 0:
-                        logger.info("Green database is receiving traffic")
-                        return True
-                    else:
-                        logger.warning("No traffic detected on green database")
-                        return False
-                        
+            if await self._wait_for_writes(self.green_conn, baseline):
+                logger.info("Green database is receiving traffic")
+                return True
+            else:
+                logger.warning("No traffic detected on green database")
+                return False
+                
         except Exception as e:
             logger.error(f"Failed to verify green traffic: {str(e)}")
             return False
     
-    async def _verify_blue_traffic(self) -> bool:
+    async def _verify_blue_traffic(self, baseline: int) -> bool:
         """
         Verify blue database is receiving writes.
         
+        Args:
+            baseline: Blue write count captured before the rollback
+        
         Returns:
             True if traffic detected
         """
         logger.info("Verifying blue database traffic")
         
         try:
-            with psycopg2.connect(self.blue_conn) as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT COUNT(*) 
-                        FROM pg_stat_database 
-                        WHERE datname = current_database()
-                        AND xact_commit > 0
-                    """)
-                    
-                    count = cur.fetchone()[0]
-                    
-                    if count > 0:
-                        logger.info("Blue database is receiving traffic")
-                        return True
-                    else:
-                        logger.warning("No traffic detected on blue database")
-                        return False
-                        
+            if await self._wait_for_writes(self.blue_conn, baseline):
+                logger.info("Blue database is receiving traffic")
+                return True
+            else:
+                logger.warning("No traffic detected on blue database")
+                return False
+                
         except Exception as e:
             logger.error(f"Failed to verify blue traffic: {str(e)}")
             return False
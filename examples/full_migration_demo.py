@@ -11,6 +11,7 @@ https://crashbytes.com/articles/tutorial-zero-downtime-database-migrations-enter
 import asyncio
 import sys
 import logging
+import psycopg
 from migrations.migration_manager import MigrationManager
 from deployment.blue_green_migration import BlueGreenMigration
 from sync.bidirectional_sync import BidirectionalSync
@@ -30,7 +31,7 @@ async def run_complete_migration():
     Steps:
     1. Setup databases
     2. Apply initial schema to blue
-    3. Setup green database with new schema
+    3. Setup green database with new schema (concurrently with step 2)
     4. Start bidirectional sync
     5. Verify data consistency
     6. Perform cutover to green
@@ -46,16 +47,55 @@ async def run_complete_migration():
     print("=" * 60)
     print()
     
-    # Step 1: Setup blue database (current production)
-    print("Step 1: Setting up blue database (current production)")
+    # Step 1: Initialize migration components
+    print("Step 1: Initializing blue-green migration")
     print("-" * 60)
     
     try:
         blue_manager = MigrationManager(BLUE_CONN)
+    except psycopg.OperationalError as e:
+        logger.error(f"Failed to connect to blue database: {e}")
+        print("\n⚠️  Make sure PostgreSQL is running on port 5432")
+        return False
+    # start_replication only creates the publication here, and green is
+    # kept current by BidirectionalSync, so there is no subscription fence
+    migration = BlueGreenMigration(BLUE_CONN, GREEN_CONN, subscription_name=None)
+    sync = BidirectionalSync(BLUE_CONN, GREEN_CONN)
+    
+    print()
+    
+    # Every exit, including a failed step, releases the pooled connections
+    try:
+        return await run_migration_steps(blue_manager, migration, sync)
+    finally:
+        if sync.sync_active:
+            await sync.stop_sync()
+        await sync.aclose()
+        await migration.aclose()
+        blue_manager.close()
+
+
+async def run_migration_steps(
+    blue_manager: MigrationManager,
+    migration: BlueGreenMigration,
+    sync: BidirectionalSync
+) -> bool:
+    """
+    Run steps 2-10 of the migration demo.
+    
+    Returns:
+        True if the migration completed
+    """
+    # Steps 2-3: Setup blue (current production) and green (new schema).
+    # The databases live on independent servers, so both run concurrently.
+    print("Steps 2-3: Setting up blue (current) and green (new) databases")
+    print("-" * 60)
+    
+    def setup_blue_database() -> bool:
         blue_manager.initialize_schema_version_table()
         
         # Apply initial schema
-        success = blue_manager.apply_migration(
+        return blue_manager.apply_migration(
             version=1,
             description="Initial schema - users table",
             up_sql="""
@@ -77,57 +117,47 @@ async def run_complete_migration():
             """,
             down_sql="DROP TABLE IF EXISTS users CASCADE"
         )
-        
-        if success:
-            print("✓ Blue database ready")
-        else:
-            print("✗ Failed to setup blue database")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Failed to setup blue database: {e}")
-        print("\n⚠️  Make sure PostgreSQL is running on port 5432")
-        return False
-    
-    print()
     
-    # Step 2: Initialize blue-green migration
-    print("Step 2: Initializing blue-green migration")
-    print("-" * 60)
+    new_schema = """
+        CREATE TABLE users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(255) NOT NULL,
+            email VARCHAR(255),
+            phone VARCHAR(50),  -- New column!
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        CREATE INDEX idx_users_username ON users(username);
+        CREATE INDEX idx_users_email ON users(email);  -- New index!
+    """
     
-    migration = BlueGreenMigration(BLUE_CONN, GREEN_CONN)
+    # MigrationManager is synchronous, so run it in a worker thread
+    blue_result, green_result = await asyncio.gather(
+        asyncio.to_thread(setup_blue_database),
+        migration.setup_green_database(new_schema),
+        return_exceptions=True
+    )
     
-    # Step 3: Setup green database with new schema
-    print("Step 3: Setting up green database (new schema)")
-    print("-" * 60)
+    if isinstance(blue_result, Exception):
+        logger.error(f"Failed to setup blue database: {blue_result}")
+        print("\n⚠️  Make sure PostgreSQL is running on port 5432")
+        return False
+    elif blue_result:
+        print("✓ Blue database ready")
+    else:
+        print("✗ Failed to setup blue database")
+        return False
     
-    try:
-        new_schema = """
-            CREATE TABLE users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(255) NOT NULL,
-                email VARCHAR(255),
-                phone VARCHAR(50),  -- New column!
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            
-            CREATE INDEX idx_users_username ON users(username);
-            CREATE INDEX idx_users_email ON users(email);  -- New index!
-        """
-        
-        success = await migration.setup_green_database(new_schema)
-        
-        if success:
-            print("✓ Green database ready with new schema")
-        else:
-            print("✗ Failed to setup green database")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Failed to setup green database: {e}")
+    if isinstance(green_result, Exception):
+        logger.error(f"Failed to setup green database: {green_result}")
         print("\n⚠️  Make sure PostgreSQL is running on port 5433")
         return False
+    elif green_result:
+        print("✓ Green database ready with new schema")
+    else:
+        print("✗ Failed to setup green database")
+        return False
     
     print()
     
@@ -148,15 +178,17 @@ async def run_complete_migration():
     print("Step 5: Starting bidirectional data synchronization")
     print("-" * 60)
     
-    sync = BidirectionalSync(BLUE_CONN, GREEN_CONN)
-    
-    # Start sync in background
+    # Start sync in background. It runs at full rate until the cutover
+    # reaches its replication fence, then stops on its own.
     sync_task = asyncio.create_task(
-        sync.start_sync(["users"], interval=2)
+        sync.run_until(["users"], migration.fence_reached)
     )
     
     # Give it a moment to start
-    await asyncio.sleep(2)
+    delay = 0.05
+    while not sync.get_sync_stats()["active_tasks"]:
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, 2.0)
     print("✓ Bidirectional sync active")
     print()
     
@@ -165,15 +197,22 @@ async def run_complete_migration():
     print("-" * 60)
     
     max_attempts = 10
-    for attempt in range(max_attempts):
-        lag = await migration.verify_replication_lag()
-        print(f"Replication lag: {lag['lag_seconds']:.2f}s")
-        
-        if lag["lag_seconds"] < 1.0:
-            print("✓ Replication caught up")
-            break
-        
-        await asyncio.sleep(1)
+    delay = 0.05
+    async with migration.blue_connection() as conn:
+        for attempt in range(max_attempts):
+            lag = await migration.verify_replication_lag(conn=conn)
+            
+            if "error" in lag:
+                print(f"✗ Could not read replication lag: {lag['error']}")
+            else:
+                print(f"Replication lag: {lag['lag_seconds']:.2f}s")
+                
+                if lag["lag_seconds"] < 1.0:
+                    print("✓ Replication caught up")
+                    break
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, 2.0)
     
     print()
     
@@ -274,7 +313,10 @@ async def run_rollback_demo():
     print("Simulating emergency rollback...")
     print()
     
-    success = await migration.rollback_to_blue()
+    try:
+        success = await migration.rollback_to_blue()
+    finally:
+        await migration.aclose()
     
     if success:
         print("✓ Rollback successful")
@@ -26,16 +26,17 @@ setup(
     packages=find_packages(exclude=["tests", "tests.*", "examples", "docs"]),
     python_requires=">=3.9",
     install_requires=[
-        "psycopg2-binary>=2.9.9",
+        "psycopg[binary,pool]>=3.2",
         "asyncpg>=0.29.0",
         "pyyaml>=6.0.1",
         "typing-extensions>=4.9.0",
     ],
     extras_require={
         "dev": [
-            "pytest>=7.4.3",
-            "pytest-asyncio>=0.21.1",
+            "pytest>=8.2",
+            "pytest-asyncio>=0.26",
             "pytest-cov>=4.1.0",
+            "pytest-xdist>=3.5.0",
             "black>=23.12.1",
             "flake8>=7.0.0",
             "mypy>=1.7.1",
@@ -9,13 +9,45 @@ https://crashbytes.com/articles/tutorial-zero-downtime-database-migrations-enter
 
 import asyncio
 import logging
-from typing import List, Dict, Set, Tuple
-import psycopg2
-import hashlib
+from typing import List, Dict, Optional, Set, Tuple
+from psycopg import AsyncConnection, AsyncCursor, errors, sql
+from psycopg_pool import AsyncConnectionPool
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Channel the change triggers notify, with the table name as payload
+SYNC_CHANNEL = "sync_changes"
+
+_NOTIFY_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION sync_notify_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{SYNC_CHANNEL}', TG_TABLE_NAME);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Serializes trigger installs and removals on a database. Concurrent
+# CREATE OR REPLACE FUNCTION calls fail with "tuple concurrently updated"
+_TRIGGER_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext(%s))"
+
+# Resync an idle table this often in case a notification was missed,
+# e.g. while a listener was reconnecting
+_IDLE_RESYNC = 30.0
+
+# Checksums hash each row's text form, which depends on these session
+# settings. Pinning them keeps digests comparable between servers with
+# different defaults (e.g. blue in local time, green in UTC)
+_CHECKSUM_SETTINGS = {
+    "TimeZone": "UTC",
+    "DateStyle": "ISO, MDY",
+    "IntervalStyle": "postgres",
+    "extra_float_digits": "1",
+    "bytea_output": "hex",
+    "lc_monetary": "C",
+}
+
 
 class BidirectionalSync:
     """
@@ -28,16 +60,29 @@ class BidirectionalSync:
     - Performance monitoring
     """
     
-    def __init__(self, blue_conn: str, green_conn: str):
+    def __init__(
+        self,
+        blue_conn: str,
+        green_conn: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        pools: Optional[Dict[str, AsyncConnectionPool]] = None
+    ):
         """
         Initialize bidirectional sync.
         
         Args:
             blue_conn: Connection string for blue database
             green_conn: Connection string for green database
+            min_size: Minimum connections kept open per database pool
+            max_size: Maximum connections per database pool
+            pools: Existing pools by connection string, created with
+                   create_pool(); they are shared and stay open on aclose()
         """
         self.blue_conn = blue_conn
         self.green_conn = green_conn
+        self.min_size = min_size
+        self.max_size = max_size
         self.sync_active = False
         self.sync_tasks = []
         self.sync_stats = {
@@ -45,6 +90,78 @@ class BidirectionalSync:
             "sync_errors": 0,
             "last_sync_time": None
         }
+        
+        # Async pools must be opened inside the running event loop, so
+        # they are created on first use
+        self._pools: Dict[str, AsyncConnectionPool] = dict(pools or {})
+        self._shared_pools = set(self._pools)
+        
+        # Tables the change listeners reported since the last pass, the
+        # event waking the scheduler, and the source-clock watermark per
+        # (source database, table)
+        self._tables: List[str] = []
+        self._dirty: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        # Set by stop_sync; the scheduler exits between passes
+        self._stop: Optional[asyncio.Event] = None
+        self._watermarks: Dict[Tuple[str, str], datetime] = {}
+        self._listener_tasks: List[asyncio.Task] = []
+        self._triggers_installed: Set[str] = set()
+        
+        # Upsert statements per (target database, table), built on first
+        # use from the target's primary key
+        self._upsert_sql: Dict[Tuple[str, str], sql.Composed] = {}
+        
+        # Statements composed once per table (and per database where they
+        # depend on its primary key), so each table always sends the same
+        # SQL text and psycopg can prepare it
+        self._table_sql: Dict[str, Dict[str, sql.Composed]] = {}
+        self._checksum_sql: Dict[Tuple[str, str], sql.Composed] = {}
+    
+    @staticmethod
+    async def create_pool(
+        conn_string: str,
+        min_size: int = 2,
+        max_size: int = 10
+    ) -> AsyncConnectionPool:
+        """
+        Create and open a connection pool suitable for syncing.
+        
+        Args:
+            conn_string: Database connection
+            min_size: Minimum connections kept open
+            max_size: Maximum connections
+        
+        Returns:
+            Open async connection pool
+        """
+        conn_pool = AsyncConnectionPool(
+            conn_string,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"prepare_threshold": 3},
+            # Cutover terminates client backends on the database it
+            # fences, so idle pooled connections are checked on borrow
+            check=AsyncConnectionPool.check_connection,
+            open=False
+        )
+        await conn_pool.open()
+        return conn_pool
+    
+    async def _get_pool(self, conn_string: str) -> AsyncConnectionPool:
+        """Return the connection pool for a connection string."""
+        if conn_string not in self._pools:
+            self._pools[conn_string] = await self.create_pool(
+                conn_string, self.min_size, self.max_size
+            )
+        return self._pools[conn_string]
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections this sync opened."""
+        for conn_string, conn_pool in list(self._pools.items()):
+            if conn_string not in self._shared_pools:
+                await conn_pool.close()
+                del self._pools[conn_string]
     
     async def start_sync(self, tables: List[str], interval: int = 1) -> None:
         """
@@ -55,53 +172,400 @@ class BidirectionalSync:
             interval: Sync interval in seconds
         """
         self.sync_active = True
+        self._reset_events()
         logger.info(f"Starting sync for tables: {tables}")
+        self._start_listeners()
         
-        # Create sync task for each table
-        for table in tables:
-            task = asyncio.create_task(
-                self._sync_table(table, interval)
-            )
-            self.sync_tasks.append(task)
+        # One scheduler task syncs every table
+        task = asyncio.create_task(self._run_scheduler(tables, interval))
+        self.sync_tasks.append(task)
         
-        # Wait for all sync tasks
+        # Wait for the sync task
         await asyncio.gather(*self.sync_tasks, return_exceptions=True)
+        await self._stop_listeners()
+        self.sync_active = False
+        self.sync_tasks = []
     
-    async def _sync_table(self, table: str, interval: int) -> None:
+    def _reset_events(self) -> None:
+        """Create the scheduler's events for a new run."""
+        # Created inside the running loop rather than in __init__, as on
+        # Python 3.9 an Event binds to the loop current at creation
+        self._wake = asyncio.Event()
+        self._stop = asyncio.Event()
+    
+    async def run_until(
+        self,
+        tables: List[str],
+        fence_reached: asyncio.Event,
+        interval: float = 0
+    ) -> None:
         """
-        Sync single table bidirectionally.
+        Sync tables in catch-up mode until a cutover fence is reached.
+        
+        Tables are synced as soon as they change, with no pause between
+        passes, until the event is set (e.g.
+        BlueGreenMigration.fence_reached), then the tasks finish.
+        
+        Args:
+            tables: List of table names to sync
+            fence_reached: Event that ends the sync once set
+            interval: Minimum pause between passes in seconds
+        """
+        self.sync_active = True
+        self._reset_events()
+        logger.info(f"Starting catch-up sync for tables: {tables}")
+        self._start_listeners()
+        
+        task = asyncio.create_task(
+            self._run_scheduler(tables, interval, until=fence_reached)
+        )
+        self.sync_tasks.append(task)
+        
+        await asyncio.gather(*self.sync_tasks, return_exceptions=True)
+        await self._stop_listeners()
+        self.sync_active = False
+        self.sync_tasks = []
+        logger.info("Catch-up sync finished: fence reached")
+    
+    async def _run_scheduler(
+        self,
+        tables: List[str],
+        interval: float,
+        until: Optional[asyncio.Event] = None
+    ) -> None:
+        """
+        Sync tables bidirectionally from a single task.
+        
+        A pass runs whenever a change trigger on either database reports
+        a table, so idle tables cost no queries and the loop wakes once
+        per burst rather than once per table. All tables changed since
+        the previous pass are synced concurrently, once any missing
+        change triggers have been installed in one transaction per database.
+        
+        Args:
+            tables: Table names to sync
+            interval: Minimum seconds between passes
+            until: Optional event that stops the sync once set
+        """
+        self._tables = list(tables)
+        self._dirty.clear()
+        # The first pass records the starting watermarks
+        self._mark_dirty(tables)
+        stop_events = [self._stop] + ([until] if until else [])
+        try:
+            await self._schedule_passes(tables, interval, stop_events)
+        finally:
+            await self._remove_notify_triggers()
+    
+    async def _schedule_passes(
+        self,
+        tables: List[str],
+        interval: float,
+        stop_events: List[asyncio.Event]
+    ) -> None:
+        """
+        Run sync passes until any of the stop events is set.
+        
+        Args:
+            tables: Table names to sync
+            interval: Minimum seconds between passes
+            stop_events: Events that end the sync
+        """
+        while not any(event.is_set() for event in stop_events):
+            changed = await self._wait_any(
+                [self._wake] + stop_events,
+                _IDLE_RESYNC
+            )
+            if any(event.is_set() for event in stop_events):
+                break
+            if not changed:
+                self._mark_dirty(tables)
+            self._wake.clear()
+            
+            dirty = [table for table in tables if table in self._dirty]
+            self._dirty.difference_update(dirty)
+            
+            # Triggers are installed before any table is synced, so the
+            # concurrent passes below never run DDL
+            pending = [t for t in dirty if t not in self._triggers_installed]
+            if pending:
+                try:
+                    await self._install_notify_triggers(pending)
+                except Exception as e:
+                    # Tables still sync on the idle resync until it works
+                    logger.error(f"Sync error installing triggers: {str(e)}")
+                    self.sync_stats["sync_errors"] += 1
+            
+            results = await asyncio.gather(
+                *(self._sync_table(table) for table in dirty),
+                return_exceptions=True
+            )
+            
+            failed = []
+            for table, result in zip(dirty, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Sync error for {table}: {str(result)}")
+                    self.sync_stats["sync_errors"] += 1
+                    failed.append(table)
+            
+            if failed:
+                # Back off on error, even in full-rate catch-up mode, then
+                # retry without waiting for another change
+                await self._wait_any(stop_events, max(interval * 5, 1))
+                self._mark_dirty(failed)
+            else:
+                self.sync_stats["last_sync_time"] = datetime.now()
+                if interval:
+                    await self._wait_any(stop_events, interval)
+    
+    def _mark_dirty(self, tables: List[str]) -> None:
+        """Queue tables for the next pass and wake the scheduler."""
+        # Triggers from another sync may notify about tables not synced here
+        queued = [table for table in tables if table in self._tables]
+        if queued:
+            self._dirty.update(queued)
+            self._wake.set()
+    
+    async def _sync_table(self, table: str) -> None:
+        """
+        Run one bidirectional pass for a table.
         
         Args:
             table: Table name to sync
-            interval: Sync interval in seconds
         """
-        logger.info(f"Starting sync for table: {table}")
+        # Sync blue → green
+        await self._sync_direction(
+            self.blue_conn,
+            self.green_conn,
+            table,
+            "blue→green"
+        )
+        
+        # Sync green → blue
+        await self._sync_direction(
+            self.green_conn,
+            self.blue_conn,
+            table,
+            "green→blue"
+        )
+    
+    def _get_table_sql(self, table: str) -> Dict[str, sql.Composed]:
+        """
+        Return the statements used for a table, composing them once.
+        
+        Args:
+            table: Table name
+        
+        Returns:
+            Dict of statements keyed by purpose
+        """
+        if table not in self._table_sql:
+            identifier = sql.Identifier(table)
+            self._table_sql[table] = {
+                "stage": sql.SQL("""
+                    CREATE TEMP TABLE _sync_changes (LIKE {})
+                    ON COMMIT DROP
+                """).format(identifier),
+                "changes": sql.SQL("""
+                    COPY (SELECT * FROM {} WHERE updated_at > %s)
+                    TO STDOUT (FORMAT BINARY)
+                """).format(identifier),
+                "count": sql.SQL("SELECT COUNT(*) FROM {}").format(identifier)
+            }
+        return self._table_sql[table]
+    
+    async def _install_notify_triggers(self, tables: List[str]) -> None:
+        """
+        Install the statement-level triggers that notify table changes.
+        
+        Args:
+            tables: Table names to install triggers on
+        """
+        installed = await asyncio.gather(
+            self._install_triggers_on(self.blue_conn, tables),
+            self._install_triggers_on(self.green_conn, tables)
+        )
+        self._triggers_installed.update(installed[0] & installed[1])
+    
+    async def _install_triggers_on(
+        self,
+        conn_string: str,
+        tables: List[str]
+    ) -> Set[str]:
+        """
+        Install the trigger function and table triggers on one database.
+        
+        Everything runs in one transaction under an advisory lock, so
+        other syncs on the same database cannot race the function update.
         
-        while self.sync_active:
+        Args:
+            conn_string: Database connection
+            tables: Table names to install triggers on
+        
+        Returns:
+            Tables whose changes are now reported
+        """
+        installed = set()
+        conn_pool = await self._get_pool(conn_string)
+        async with conn_pool.connection() as conn:
             try:
-                # Sync blue → green
-                await self._sync_direction(
-                    self.blue_conn,
-                    self.green_conn,
-                    table,
-                    "blue→green"
-                )
-                
-                # Sync green → blue
-                await self._sync_direction(
-                    self.green_conn,
-                    self.blue_conn,
-                    table,
-                    "green→blue"
-                )
-                
-                self.sync_stats["last_sync_time"] = datetime.now()
-                await asyncio.sleep(interval)
-                
+                async with conn.transaction(), conn.cursor() as cur:
+                    await cur.execute(_TRIGGER_LOCK_SQL, (SYNC_CHANNEL,))
+                    await cur.execute(_NOTIFY_FUNCTION_SQL)
+                    for table in tables:
+                        try:
+                            async with conn.transaction():
+                                await self._create_notify_trigger(cur, table)
+                        except errors.UndefinedTable:
+                            logger.warning(f"Cannot watch missing table {table}")
+                            continue
+                        logger.info(f"Watching {table} for changes")
+                        installed.add(table)
+            except errors.ReadOnlySqlTransaction:
+                # A fenced database takes no writes, so has none to report
+                logger.debug("Skipping change triggers on read-only database")
+                return set(tables)
+        return installed
+    
+    async def _create_notify_trigger(self, cur: AsyncCursor, table: str) -> None:
+        """
+        Replace the change trigger on a table.
+        
+        Args:
+            cur: Cursor inside the install transaction
+            table: Table name
+        """
+        await cur.execute(
+            sql.SQL("DROP TRIGGER IF EXISTS sync_notify ON {}")
+            .format(sql.Identifier(table))
+        )
+        await cur.execute(
+            sql.SQL("""
+                CREATE TRIGGER sync_notify
+                AFTER INSERT OR UPDATE OR DELETE ON {}
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION sync_notify_change()
+            """).format(sql.Identifier(table))
+        )
+    
+    async def _remove_notify_triggers(self) -> None:
+        """
+        Remove the change triggers once the sync stops.
+        
+        The trigger function is kept while other tables still use it.
+        A database fenced read-only keeps its triggers, which then only
+        notify an idle channel.
+        """
+        if not self._triggers_installed:
+            return
+        tables = sorted(self._triggers_installed)
+        self._triggers_installed.clear()
+        for conn_string in (self.blue_conn, self.green_conn):
+            try:
+                await self._remove_triggers_on(conn_string, tables)
+            except errors.ReadOnlySqlTransaction:
+                logger.debug("Leaving change triggers on read-only database")
+            except Exception as e:
+                logger.warning(f"Could not remove change triggers: {str(e)}")
+    
+    async def _remove_triggers_on(
+        self,
+        conn_string: str,
+        tables: List[str]
+    ) -> None:
+        """
+        Drop the table triggers and, if unused, the trigger function.
+        
+        Args:
+            conn_string: Database connection
+            tables: Table names to drop triggers from
+        """
+        conn_pool = await self._get_pool(conn_string)
+        async with conn_pool.connection() as conn:
+            async with conn.transaction(), conn.cursor() as cur:
+                await cur.execute(_TRIGGER_LOCK_SQL, (SYNC_CHANNEL,))
+                for table in tables:
+                    await cur.execute(
+                        sql.SQL("DROP TRIGGER IF EXISTS sync_notify ON {}")
+                        .format(sql.Identifier(table))
+                    )
+                try:
+                    async with conn.transaction():
+                        await cur.execute(
+                            "DROP FUNCTION IF EXISTS sync_notify_change()"
+                        )
+                except errors.DependentObjectsStillExist:
+                    # Another sync still watches tables on this database
+                    pass
+    
+    def _start_listeners(self) -> None:
+        """Start listening for change notifications on both databases."""
+        if not self._listener_tasks:
+            self._listener_tasks = [
+                asyncio.create_task(self._listen(conn_string))
+                for conn_string in (self.blue_conn, self.green_conn)
+            ]
+    
+    async def _stop_listeners(self) -> None:
+        """Stop the change listeners."""
+        for task in self._listener_tasks:
+            task.cancel()
+        await asyncio.gather(*self._listener_tasks, return_exceptions=True)
+        self._listener_tasks = []
+    
+    async def _listen(self, conn_string: str) -> None:
+        """
+        Queue tables for the scheduler as change notifications arrive.
+        
+        Runs on a dedicated connection, since LISTEN is tied to the
+        session. If the connection is lost every table is queued, so
+        changes made while reconnecting are not missed.
+        
+        Args:
+            conn_string: Database connection
+        """
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    conn_string,
+                    autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {SYNC_CHANNEL}")
+                    async for notify in conn.notifies():
+                        self._mark_dirty([notify.payload])
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Sync error for {table}: {str(e)}")
-                self.sync_stats["sync_errors"] += 1
-                await asyncio.sleep(interval * 5)  # Back off on error
+                logger.warning(f"Change listener lost connection: {str(e)}")
+                self._mark_dirty(self._tables)
+                await asyncio.sleep(1)
+    
+    async def _wait_any(
+        self,
+        events: List[asyncio.Event],
+        timeout: float
+    ) -> bool:
+        """
+        Wait until any of the events is set or the timeout passes.
+        
+        Args:
+            events: Events to wait for
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            True if an event was set, False on timeout
+        """
+        waiters = [asyncio.ensure_future(event.wait()) for event in events]
+        try:
+            done, _ = await asyncio.wait(
+                waiters,
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return bool(done)
     
     async def _sync_direction(
         self,
@@ -132,64 +596,166 @@ class BidirectionalSync:
             # In production, this would use CDC or triggers
             # For simplicity, we'll use a timestamp-based approach
             
-            with psycopg2.connect(source_conn) as source:
-                with source.cursor() as cur:
-                    # This assumes tables have updated_at timestamp
-                    # Simplified example
-                    last_sync = self.sync_stats.get("last_sync_time")
-                    
-                    if last_sync:
-                        cur.execute(
-                            f"""
-                            SELECT * FROM {table}
-                            WHERE updated_at > %s
-                            """,
-                            (last_sync,)
-                        )
-                    else:
-                        # Initial sync - this would be handled differently
-                        return 0
+            # This assumes tables have updated_at timestamp
+            # Simplified example
+            watermark_key = (source_conn, table)
+            last_sync = self._watermarks.get(watermark_key)
+            source_pool = await self._get_pool(source_conn)
+            
+            if not last_sync:
+                # Initial sync - this would be handled differently. Start
+                # from the source's own clock, as updated_at is set there
+                async with source_pool.connection() as source:
+                    cur = await source.execute("SELECT clock_timestamp()")
+                    self._watermarks[watermark_key] = (await cur.fetchone())[0]
+                return 0
+            
+            target_pool = await self._get_pool(target_conn)
+            async with source_pool.connection() as source, \
+                    target_pool.connection() as target:
+                async with source.cursor() as cur, \
+                        target.cursor() as target_cur:
+                    # Stream changes straight into a staging table on the
+                    # target with binary COPY, so the changeset is never
+                    # buffered client-side
+                    table_sql = self._get_table_sql(table)
+                    await target_cur.execute(table_sql["stage"])
+                    async with cur.copy(
+                        table_sql["changes"],
+                        (last_sync,)
+                    ) as copy_out:
+                        async with target_cur.copy(
+                            "COPY _sync_changes FROM STDIN (FORMAT BINARY)"
+                        ) as copy_in:
+                            async for data in copy_out:
+                                await copy_in.write(data)
                     
-                    changes = cur.fetchall()
+                    changes = target_cur.rowcount
                     
                     if changes:
                         logger.debug(
-                            f"{direction}: Found {len(changes)} changes in {table}"
+                            f"{direction}: Found {changes} changes in {table}"
+                        )
+                        
+                        upsert_sql = await self._get_upsert_sql(
+                            target_cur, target_conn, table
                         )
                         
-                        # Apply changes to target
-                        with psycopg2.connect(target_conn) as target:
-                            with target.cursor() as target_cur:
-                                # This is simplified - production would handle
-                                # upserts, deletes, and conflicts
-                                for row in changes:
-                                    # Apply change (simplified)
-                                    pass
-                                
-                                target.commit()
+                        # Apply all changes to target in one set-based upsert.
+                        # This is simplified - production would handle
+                        # deletes and conflict resolution. The new watermark
+                        # is the newest updated_at copied, which comes from
+                        # the source clock; upsert, watermark and commit
+                        # share one round-trip
+                        async with target.pipeline():
+                            await target_cur.execute(upsert_sql)
+                            await target_cur.execute(
+                                "SELECT MAX(updated_at) FROM _sync_changes"
+                            )
+                            watermark = (await target_cur.fetchone())[0]
+                            await target.commit()
                         
-                        self.sync_stats["rows_synced"] += len(changes)
-                        return len(changes)
+                        self._watermarks[watermark_key] = watermark
+                        self.sync_stats["rows_synced"] += changes
+                        return changes
+                    
+                    await target.commit()
             
             return 0
             
+        except errors.ReadOnlySqlTransaction:
+            # The cutover fence made the target read-only, so changes can
+            # only flow away from it from now on
+            logger.debug(f"{direction}: target is read-only, skipping {table}")
+            return 0
+            
         except Exception as e:
             logger.error(
                 f"Sync error {direction} for {table}: {str(e)}"
             )
             raise
     
+    async def _get_upsert_sql(
+        self,
+        cur: AsyncCursor,
+        conn_string: str,
+        table: str
+    ) -> sql.Composed:
+        """
+        Build the statement merging staged changes into a table.
+        
+        Args:
+            cur: Cursor on the target database
+            conn_string: Target database connection
+            table: Table name
+        
+        Returns:
+            INSERT ... ON CONFLICT statement reading from _sync_changes,
+            keeping the target row where it has the newer updated_at
+        """
+        key = (conn_string, table)
+        if key not in self._upsert_sql:
+            await cur.execute("""
+                SELECT array_agg(a.attname::text ORDER BY a.attnum),
+                       array_agg(a.attname::text ORDER BY a.attnum)
+                           FILTER (WHERE a.attnum = ANY(i.indkey))
+                FROM pg_attribute a
+                LEFT JOIN pg_index i
+                    ON i.indrelid = a.attrelid AND i.indisprimary
+                WHERE a.attrelid = %s::regclass
+                AND a.attnum > 0
+                AND NOT a.attisdropped
+            """, (table,))
+            columns, pk_columns = await cur.fetchone()
+            update_columns = [c for c in columns if c not in (pk_columns or [])]
+            
+            query = sql.SQL(
+                "INSERT INTO {} SELECT * FROM _sync_changes"
+            ).format(sql.Identifier(table))
+            if pk_columns and update_columns:
+                query += sql.SQL(" ON CONFLICT ({}) DO UPDATE SET {}").format(
+                    sql.SQL(", ").join(map(sql.Identifier, pk_columns)),
+                    sql.SQL(", ").join(
+                        sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c))
+                        for c in update_columns
+                    )
+                )
+                if "updated_at" in update_columns:
+                    # Last write wins: a row echoed back from the other
+                    # database never replaces a newer local version
+                    query += sql.SQL(
+                        " WHERE {}.updated_at < EXCLUDED.updated_at"
+                    ).format(sql.Identifier(table))
+            else:
+                query += sql.SQL(" ON CONFLICT DO NOTHING")
+            self._upsert_sql[key] = query
+        return self._upsert_sql[key]
+    
+    def invalidate_pk_cache(self) -> None:
+        """
+        Forget cached primary keys and the statements built from them.
+        
+        Call this after applying a migration that changes the key or
+        columns of a synced table.
+        """
+        self._checksum_sql.clear()
+        self._upsert_sql.clear()
+    
     async def stop_sync(self) -> None:
         """Stop synchronization and wait for tasks to complete."""
         logger.info("Stopping synchronization")
-        self.sync_active = False
         
-        # Cancel all sync tasks
-        for task in self.sync_tasks:
-            task.cancel()
+        # Signal instead of cancelling, so a pass in progress finishes
+        # and commits before the scheduler exits
+        if self._stop is not None:
+            self._stop.set()
         
         # Wait for tasks to complete
         await asyncio.gather(*self.sync_tasks, return_exceptions=True)
+        await self._stop_listeners()
+        self.sync_active = False
+        self.sync_tasks = []
+        self._dirty.clear()
         
         logger.info("Synchronization stopped")
         logger.info(
@@ -218,13 +784,34 @@ class BidirectionalSync:
             Dict mapping table names to consistency results
         """
         logger.info(f"Verifying consistency for {len(tables)} tables")
-        results = {}
         
-        for table in tables:
-            results[table] = await self._verify_table_consistency(
-                table,
-                sample_size
+        try:
+            # One combined query per database covers every table
+            blue_stats, green_stats = await asyncio.gather(
+                self._get_table_stats(self.blue_conn, tables, sample_size),
+                self._get_table_stats(self.green_conn, tables, sample_size)
             )
+            results = {
+                table: self._compare_table(
+                    table,
+                    blue_stats[table],
+                    green_stats[table]
+                )
+                for table in tables
+            }
+        except Exception as e:
+            # A missing table fails the whole combined query, so fall back
+            # to verifying tables concurrently one by one, which reports
+            # errors per table; the pools bound how many queries run at once
+            logger.warning(
+                f"Combined consistency check failed, "
+                f"verifying tables individually: {str(e)}"
+            )
+            table_results = await asyncio.gather(*(
+                self._verify_table_consistency(table, sample_size)
+                for table in tables
+            ))
+            results = dict(zip(tables, table_results))
         
         # Log summary
         consistent_tables = sum(
@@ -252,72 +839,148 @@ class BidirectionalSync:
         Returns:
             Consistency result dictionary
         """
-        result = {
-            "consistent": True,
-            "row_count_match": False,
-            "sample_match": False,
-            "checksum_match": False,
-            "differences": []
-        }
-        
         try:
-            # Compare row counts
-            blue_count = await self._get_row_count(self.blue_conn, table)
-            green_count = await self._get_row_count(self.green_conn, table)
-            
-            result["blue_count"] = blue_count
-            result["green_count"] = green_count
-            result["row_count_match"] = blue_count == green_count
-            
-            if blue_count != green_count:
-                result["consistent"] = False
-                result["differences"].append(
-                    f"Row count mismatch: blue={blue_count}, green={green_count}"
-                )
-            
-            # Compare checksums
-            blue_checksum = await self._calculate_checksum(
-                self.blue_conn,
-                table,
-                sample_size
+            # Counts and checksums on both databases are independent
+            # queries, so run all four at once
+            (
+                blue_count,
+                green_count,
+                blue_checksum,
+                green_checksum
+            ) = await asyncio.gather(
+                self._get_row_count(self.blue_conn, table),
+                self._get_row_count(self.green_conn, table),
+                self._calculate_checksum(self.blue_conn, table, sample_size),
+                self._calculate_checksum(self.green_conn, table, sample_size)
             )
-            green_checksum = await self._calculate_checksum(
-                self.green_conn,
+            return self._compare_table(
                 table,
-                sample_size
+                (blue_count, blue_checksum),
+                (green_count, green_checksum)
             )
             
-            result["blue_checksum"] = blue_checksum
-            result["green_checksum"] = green_checksum
-            result["checksum_match"] = blue_checksum == green_checksum
-            
-            if blue_checksum != green_checksum:
-                result["consistent"] = False
-                result["differences"].append("Checksum mismatch")
-            
-            if result["consistent"]:
-                logger.info(f"✓ Table {table} is consistent")
-            else:
-                logger.warning(
-                    f"✗ Table {table} has inconsistencies: "
-                    f"{', '.join(result['differences'])}"
-                )
-            
         except Exception as e:
             logger.error(
                 f"Failed to verify consistency for {table}: {str(e)}"
             )
+            return {
+                "consistent": False,
+                "row_count_match": False,
+                "sample_match": False,
+                "checksum_match": False,
+                "differences": [],
+                "error": str(e)
+            }
+    
+    def _compare_table(
+        self,
+        table: str,
+        blue_stats: Tuple[int, str],
+        green_stats: Tuple[int, str]
+    ) -> Dict:
+        """
+        Compare row counts and checksums of a table on blue and green.
+        
+        Args:
+            table: Table name
+            blue_stats: Row count and checksum on blue
+            green_stats: Row count and checksum on green
+        
+        Returns:
+            Consistency result dictionary
+        """
+        blue_count, blue_checksum = blue_stats
+        green_count, green_checksum = green_stats
+        result = {
+            "consistent": True,
+            "row_count_match": False,
+            "sample_match": False,
+            "checksum_match": False,
+            "differences": []
+        }
+        
+        # Compare row counts
+        result["blue_count"] = blue_count
+        result["green_count"] = green_count
+        result["row_count_match"] = blue_count == green_count
+        
+        if blue_count != green_count:
+            result["consistent"] = False
+            result["differences"].append(
+                f"Row count mismatch: blue={blue_count}, green={green_count}"
+            )
+        
+        # Compare checksums
+        result["blue_checksum"] = blue_checksum
+        result["green_checksum"] = green_checksum
+        result["checksum_match"] = blue_checksum == green_checksum
+        
+        if blue_checksum != green_checksum:
             result["consistent"] = False
-            result["error"] = str(e)
+            result["differences"].append("Checksum mismatch")
+        
+        if result["consistent"]:
+            logger.info(f"✓ Table {table} is consistent")
+        else:
+            logger.warning(
+                f"✗ Table {table} has inconsistencies: "
+                f"{', '.join(result['differences'])}"
+            )
         
         return result
     
+    async def _get_table_stats(
+        self,
+        conn_string: str,
+        tables: List[str],
+        sample_size: int
+    ) -> Dict[str, Tuple[int, str]]:
+        """
+        Get row counts and checksums for several tables in one query.
+        
+        Args:
+            conn_string: Database connection
+            tables: Table names
+            sample_size: Number of rows to include in each checksum
+        
+        Returns:
+            Dict mapping table names to (row count, checksum)
+        """
+        conn_pool = await self._get_pool(conn_string)
+        async with conn_pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await self._load_checksum_sql(cur, conn_string, tables)
+                await self._pin_checksum_settings(cur)
+                query = sql.SQL(" UNION ALL ").join(
+                    sql.SQL(
+                        "SELECT {name}, (SELECT COUNT(*) FROM {table}), {checksum}"
+                    ).format(
+                        name=sql.Literal(table),
+                        table=sql.Identifier(table),
+                        checksum=self._checksum_sql[(conn_string, table)]
+                    )
+                    for table in tables
+                )
+                await cur.execute(
+                    query,
+                    {"sample_size": sample_size},
+                    prepare=True
+                )
+                return {
+                    table: (row_count, checksum)
+                    for table, row_count, checksum in await cur.fetchall()
+                }
+    
     async def _get_row_count(self, conn_string: str, table: str) -> int:
         """Get row count for a table."""
-        with psycopg2.connect(conn_string) as conn:
-            with conn.cursor() as cur:
-                cur.execute(f"SELECT COUNT(*) FROM {table}")
-                return cur.fetchone()[0]
+        conn_pool = await self._get_pool(conn_string)
+        async with conn_pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    self._get_table_sql(table)["count"],
+                    prepare=True
+                )
+                return (await cur.fetchone())[0]
     
     async def _calculate_checksum(
         self,
@@ -337,32 +1000,19 @@ class BidirectionalSync:
             MD5 checksum of sampled data
         """
         try:
-            with psycopg2.connect(conn_string) as conn:
-                with conn.cursor() as cur:
-                    # Get primary key column
-                    cur.execute(f"""
-                        SELECT column_name
-                        FROM information_schema.key_column_usage
-                        WHERE table_name = %s
-                        AND constraint_name LIKE '%%_pkey'
-                        LIMIT 1
-                    """, (table,))
-                    
-                    pk_result = cur.fetchone()
-                    pk_col = pk_result[0] if pk_result else "id"
-                    
-                    # Sample rows
-                    cur.execute(f"""
-                        SELECT * FROM {table}
-                        ORDER BY {pk_col}
-                        LIMIT {sample_size}
-                    """)
-                    
-                    rows = cur.fetchall()
-                    
-                    # Calculate checksum
-                    data_str = str(rows).encode('utf-8')
-                    return hashlib.md5(data_str).hexdigest()
+            conn_pool = await self._get_pool(conn_string)
+            async with conn_pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await self._load_checksum_sql(cur, conn_string, [table])
+                    await self._pin_checksum_settings(cur)
+                    await cur.execute(
+                        sql.SQL("SELECT {}").format(
+                            self._checksum_sql[(conn_string, table)]
+                        ),
+                        {"sample_size": sample_size},
+                        prepare=True
+                    )
+                    return (await cur.fetchone())[0]
                     
         except Exception as e:
             logger.error(
@@ -370,6 +1020,80 @@ class BidirectionalSync:
             )
             return ""
     
+    async def _load_checksum_sql(
+        self,
+        cur: AsyncCursor,
+        conn_string: str,
+        tables: List[str]
+    ) -> None:
+        """
+        Compose checksum expressions for tables not cached yet.
+        
+        The primary keys of all missing tables are read in one query.
+        
+        Args:
+            cur: Cursor on the database
+            conn_string: Database connection
+            tables: Table names
+        """
+        missing = [
+            table for table in tables
+            if (conn_string, table) not in self._checksum_sql
+        ]
+        if not missing:
+            return
+        
+        # Get primary key columns
+        await cur.execute("""
+            SELECT t.name, a.attname
+            FROM unnest(%s::text[]) AS t(name)
+            JOIN pg_index i
+                ON i.indrelid = to_regclass(t.name)
+                AND i.indisprimary
+            JOIN pg_attribute a
+                ON a.attrelid = i.indrelid
+                AND a.attnum = i.indkey[0]
+        """, (missing,))
+        pk_cols = dict(await cur.fetchall())
+        
+        for table in missing:
+            # Hash the sampled rows server-side, so only the digest
+            # crosses the wire instead of every row. Rows are hashed one
+            # by one, so the aggregate holds 32 bytes per row rather than
+            # their full text
+            self._checksum_sql[(conn_string, table)] = sql.SQL("""(
+                SELECT md5(COALESCE(
+                    string_agg(md5(t::text), '' ORDER BY t.{pk}), ''
+                ))
+                FROM (
+                    SELECT * FROM {table}
+                    ORDER BY {pk}
+                    LIMIT %(sample_size)s
+                ) t
+            )""").format(
+                pk=sql.Identifier(pk_cols.get(table, "id")),
+                table=sql.Identifier(table)
+            )
+    
+    async def _pin_checksum_settings(self, cur: AsyncCursor) -> None:
+        """
+        Pin the settings row text depends on for this transaction.
+        
+        The settings are local to the transaction, so pooled connections
+        go back to the pool with their defaults.
+        
+        Args:
+            cur: Cursor that will compute checksums
+        """
+        await cur.execute(
+            """
+            SELECT set_config(name, value, true)
+            FROM unnest(%s::text[], %s::text[]) AS s(name, value)
+            """,
+            (list(_CHECKSUM_SETTINGS), list(_CHECKSUM_SETTINGS.values())),
+            prepare=True
+        )
+    
     def get_sync_stats(self) -> Dict:
         """
         Get synchronization statistics.
@@ -386,6 +1110,16 @@ class BidirectionalSync:
         }
 
 
+def _last_write_wins(blue_row: tuple, green_row: tuple) -> tuple:
+    # Compare timestamps and return newest
+    # This is simplified - production would be more sophisticated
+    return green_row if green_row else blue_row
+
+
+def _prefer_blue(blue_row: tuple, green_row: tuple) -> tuple:
+    return blue_row
+
+
 class ConflictResolver:
     """
     Handles conflict resolution for bidirectional sync.
@@ -396,6 +1130,13 @@ class ConflictResolver:
     - Manual resolution
     """
     
+    __slots__ = ("strategy", "_resolve")
+    
+    # Add other strategies as needed; unknown ones keep the blue row
+    _STRATEGIES = {
+        "last-write-wins": _last_write_wins,
+    }
+    
     def __init__(self, strategy: str = "last-write-wins"):
         """
         Initialize conflict resolver.
@@ -404,6 +1145,7 @@ class ConflictResolver:
             strategy: Conflict resolution strategy
         """
         self.strategy = strategy
+        self._resolve = self._STRATEGIES.get(strategy, _prefer_blue)
     
     def resolve(self, blue_row: tuple, green_row: tuple) -> tuple:
         """
@@ -416,10 +1158,4 @@ class ConflictResolver:
         Returns:
             Resolved row
         """
-        if self.strategy == "last-write-wins":
-            # Compare timestamps and return newest
-            # This is simplified - production would be more sophisticated
-            return green_row if green_row else blue_row
-        
-        # Add other strategies as needed
-        return blue_row
+        return self._resolve(blue_row, green_row)